@@ -1,23 +1,50 @@
-﻿from typing import Any, Dict
+﻿from typing import Any, Dict, Optional
 
+import asyncio
+import os
 import re
+import sys
 
+from fastapi import Depends
 from fastapi import FastAPI
+from fastapi import HTTPException
 from fastapi import Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic import Field
 from threading import Lock
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import AsyncIterator, List
 
 from verticals.restaurant.service import RestaurantService
 
 from pathlib import Path
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Carrega as configuracoes existentes antes da primeira requisicao
+    for config_file in sorted(CONFIG_DIR.glob("*.json")):
+        try:
+            get_service(config_file.stem)
+        except (HTTPException, OSError, ValueError) as exc:
+            print("Configuracao ignorada:", config_file.name, exc)
+    yield
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 BASE_DIR = Path(__file__).resolve().parent
+CONFIG_DIR = BASE_DIR / "verticals" / "restaurant" / "config"
+CONFIG_PREFIX = str(CONFIG_DIR) + os.sep
+_INVALID_RESTAURANT_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
 notifications_store: dict[str, list[dict[str, Any]]] = {}
 notifications_lock = Lock()
 _SESSION_FLAGS: Dict[str, Dict[str, Any]] = {}
+MAX_BATCH_MESSAGES = 20
 
 # CORS para permitir chamadas do frontend local (file:// ou http://localhost)
 app.add_middleware(
@@ -28,11 +55,36 @@ app.add_middleware(
 )
 
 
-@app.post("/restaurant/{restaurant_id}/chat")
-async def restaurant_chat(restaurant_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
-    message = body.get("message", "")
-    state = body.get("state", {}) or {}
+class ChatRequest(BaseModel):
+    message: str = ""
+    state: Optional[Dict[str, Any]] = None
+
+
+class ChatBatchRequest(BaseModel):
+    # Cada mensagem pode criar pedido/checkout (HTTP bloqueante): limita o lote
+    messages: List[str] = Field(default_factory=list, max_length=MAX_BATCH_MESSAGES)
+    state: Optional[Dict[str, Any]] = None
+
+
+@lru_cache(maxsize=64)
+def _load_service(config_path: str, mtime: float) -> RestaurantService:
+    # mtime entra na chave para recarregar o arquivo quando ele for alterado
+    return RestaurantService(config_path=config_path)
+
+
+def get_service(restaurant_id: str) -> RestaurantService:
+    # O id vira nome de arquivo: so aceita caracteres seguros (evita path traversal)
+    if not restaurant_id or _INVALID_RESTAURANT_ID_RE.search(restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurante nao encontrado")
+    config_path = CONFIG_PREFIX + restaurant_id + ".json"
+    try:
+        config_mtime = os.stat(config_path).st_mtime
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Restaurante nao encontrado")
+    return _load_service(config_path, config_mtime)
+
 
+def _run_chat_turn(service: RestaurantService, message: str, state: Dict[str, Any]) -> Dict[str, Any]:
     session_id = str(state.get("session_id") or "").strip()
     if session_id:
         with notifications_lock:
@@ -42,9 +94,6 @@ async def restaurant_chat(restaurant_id: str, body: Dict[str, Any]) -> Dict[str,
             state["order_paid"] = True
             if flags.get("order_id") and not state.get("order_id"):
                 state["order_id"] = flags["order_id"]
-    service = RestaurantService(
-        config_path=BASE_DIR / "verticals" / "restaurant" / "config" / f"{restaurant_id}.json"
-    )
     result = service.process_message(message, state)
 
     # Atualiza state com o retorno do service, se houver
@@ -79,6 +128,32 @@ async def restaurant_chat(restaurant_id: str, body: Dict[str, Any]) -> Dict[str,
     return response
 
 
+@app.post("/restaurant/{restaurant_id}/chat")
+async def restaurant_chat(
+    body: ChatRequest,
+    service: RestaurantService = Depends(get_service),
+) -> Dict[str, Any]:
+    # O turno faz chamadas HTTP bloqueantes: roda fora do event loop
+    return await run_in_threadpool(_run_chat_turn, service, body.message, body.state or {})
+
+
+@app.post("/restaurant/{restaurant_id}/chat/batch")
+async def restaurant_chat_batch(
+    body: ChatBatchRequest,
+    service: RestaurantService = Depends(get_service),
+) -> Dict[str, Any]:
+    # Processa varias mensagens em sequencia numa unica requisicao,
+    # repassando o state de uma mensagem para a proxima
+    state = body.state or {}
+    turns: List[Dict[str, Any]] = []
+    for message in body.messages:
+        # O turno faz chamadas HTTP bloqueantes: roda fora do event loop
+        turn = await run_in_threadpool(_run_chat_turn, service, message, state)
+        state = turn.pop("state")
+        turns.append(turn)
+    return {"turns": turns, "state": state}
+
+
 @app.post("/assistant/notify")
 async def assistant_notify(body: Dict[str, Any]) -> Dict[str, Any]:
     session_id = str(body.get("session_id") or "").strip()
@@ -139,3 +214,27 @@ async def assistant_notifications(session_id: str = Query(default="")) -> Dict[s
 @app.get("/assistant/notifications/{session_id}")
 async def assistant_notifications_legacy(session_id: str) -> Dict[str, Any]:
     return await assistant_notifications(session_id=session_id)
+
+
+def _install_uring_loop() -> bool:
+    # Loop baseado em io_uring (opcional, apenas Linux); sem ele fica o loop padrao
+    if sys.platform != "linux":
+        return False
+    try:
+        import uringcore
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uringcore.EventLoopPolicy())
+    return True
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Com a politica io_uring instalada o uvicorn nao pode trocar o loop
+    uvicorn.run(
+        app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="none" if _install_uring_loop() else "auto",
+    )
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import time
@@ -6,6 +5,7 @@ from typing import Any, Optional
 from urllib import error as url_error
 from urllib import request as url_request
 
+import orjson
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,8 +30,9 @@ def _get_json(path: str, base_url: Optional[str] = None) -> Optional[Any]:
         with url_request.urlopen(url, timeout=TIMEOUT_SECONDS) as response:
             if response.status != 200:
                 return None
-            payload = response.read().decode("utf-8")
-        return json.loads(payload)
+            payload = response.read()
+        # orjson decodifica o UTF-8 direto dos bytes; JSONDecodeError e um ValueError
+        return orjson.loads(payload)
     except (url_error.HTTPError, url_error.URLError, ValueError):
         return None
     except Exception:
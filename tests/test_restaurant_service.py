@@ -1,10 +1,10 @@
 from pathlib import Path
 
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
-from main import app
-from verticals.restaurant.service import RestaurantService
+from main import MAX_BATCH_MESSAGES, app, get_service
 import verticals.restaurant.service as service_module
 import services.menu_api_client as menu_api_client
 
@@ -32,11 +32,6 @@ def _mock_checkout(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(service_module, "_create_checkout", _fake_checkout)
 
 
-@pytest.fixture(autouse=True)
-def _mock_open(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr(service_module, "is_open", lambda *_args, **_kwargs: True)
-
-
 @pytest.fixture(autouse=True)
 def _mock_menu_api(monkeypatch: pytest.MonkeyPatch) -> None:
     def _fake_menu():
@@ -61,12 +56,8 @@ def _mock_menu_api(monkeypatch: pytest.MonkeyPatch) -> None:
 
 
 def test_restaurant_chat_flow(_config_info: dict) -> None:
-    config_path = _config_info["path"]
     restaurant_id = _config_info["restaurant_id"]
-
-    service = RestaurantService(str(config_path))
-    first_category = next(iter(service.config.menu.values()))
-    item_id = first_category[0].id
+    item_id = "calabresa"
 
     client = TestClient(app)
 
@@ -77,7 +68,7 @@ def test_restaurant_chat_flow(_config_info: dict) -> None:
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
-    assert item_id.lower() in data["message"].lower()
+    assert "pizza calabresa" in data["message"].lower()
 
     response = client.post(
         f"/restaurant/{restaurant_id}/chat",
@@ -85,7 +76,8 @@ def test_restaurant_chat_flow(_config_info: dict) -> None:
     )
     assert response.status_code == 200
     data = response.json()
-    assert data["state"]["cart"][0]["id"] == item_id
+    assert data["state"]["cart"] == [{"id": item_id, "quantity": 1}]
+    assert "Total parcial (com entrega): R$ 44.90" in data["message"]
 
     response = client.post(
         f"/restaurant/{restaurant_id}/chat",
@@ -94,47 +86,46 @@ def test_restaurant_chat_flow(_config_info: dict) -> None:
     assert response.status_code == 200
     data = response.json()
     assert "checkout_url" not in data
-    assert "Resumo do pedido" in data["message"]
+    assert "nome" in data["message"].lower()
 
     response = client.post(
         f"/restaurant/{restaurant_id}/chat",
-        json={"message": "sim", "state": data["state"]},
+        json={"message": "Joao", "state": data["state"]},
     )
     assert response.status_code == 200
     data = response.json()
-    assert "nome" in data["message"].lower()
+    assert "endereco" in data["message"].lower()
 
     response = client.post(
         f"/restaurant/{restaurant_id}/chat",
-        json={"message": "Joao", "state": data["state"]},
+        json={"message": "Rua A, 123", "state": data["state"]},
     )
     assert response.status_code == 200
     data = response.json()
-    assert "endereco" in data["message"].lower()
+    assert "whatsapp" in data["message"].lower()
 
     response = client.post(
         f"/restaurant/{restaurant_id}/chat",
-        json={"message": "Rua A, 123", "state": data["state"]},
+        json={"message": "11 98888-7777", "state": data["state"]},
     )
     assert response.status_code == 200
     data = response.json()
-    assert "order_id" in data
-    assert "checkout_url" in data
+    assert data["order_id"] == 123
+    assert data["checkout_url"] == "http://checkout.test/abc"
     assert "forma de pagamento" in data["message"].lower()
 
 
-def test_menu_empty_from_api(_config_info: dict) -> None:
-    config_path = _config_info["path"]
+def test_menu_empty_from_api(_config_info: dict, monkeypatch: pytest.MonkeyPatch) -> None:
     restaurant_id = _config_info["restaurant_id"]
 
     def _empty_menu():
         return {"categories": []}
 
-    service_module.get_menu = _empty_menu
-    menu_api_client.get_menu = _empty_menu
-    service = RestaurantService(str(config_path))
-    assert service.config.menu == {}
-    assert service_module._menu_text_from_menu(service.config.menu) == "Nenhum produto cadastrado no momento."
+    monkeypatch.setattr(service_module, "get_menu", _empty_menu)
+    monkeypatch.setattr(menu_api_client, "get_menu", _empty_menu)
+    snapshot = service_module._load_menu_snapshot(_empty_menu())
+    assert snapshot.menu == {}
+    assert snapshot.menu_text == "Nenhum produto cadastrado no momento."
 
     client = TestClient(app)
     response = client.post(
@@ -151,4 +142,97 @@ def test_menu_empty_from_api(_config_info: dict) -> None:
     )
     assert response.status_code == 200
     data = response.json()
-    assert data["message"] == "Nenhum produto cadastrado no momento."
+    assert data["message"] == "Seu carrinho esta vazio. Escolha um item do cardapio."
+
+
+def test_restaurant_chat_batch(_config_info: dict) -> None:
+    restaurant_id = _config_info["restaurant_id"]
+    client = TestClient(app)
+
+    response = client.post(
+        f"/restaurant/{restaurant_id}/chat/batch",
+        json={"messages": ["menu", "2 calabresa"], "state": {"restaurant_id": 1}},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["turns"]) == 2
+    assert "calabresa" in data["turns"][0]["message"].lower()
+    assert "state" not in data["turns"][0]
+    assert data["state"]["cart"] == [{"id": "calabresa", "quantity": 2}]
+
+
+def test_restaurant_chat_batch_rejects_oversized_batch(_config_info: dict) -> None:
+    restaurant_id = _config_info["restaurant_id"]
+    client = TestClient(app)
+
+    response = client.post(
+        f"/restaurant/{restaurant_id}/chat/batch",
+        json={"messages": ["menu"] * (MAX_BATCH_MESSAGES + 1)},
+    )
+    assert response.status_code == 422
+
+
+def test_restaurant_chat_unknown_restaurant() -> None:
+    client = TestClient(app)
+
+    response = client.post("/restaurant/nao_existe/chat", json={"message": "menu"})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Restaurante nao encontrado"}
+
+
+@pytest.mark.parametrize("restaurant_id", ["pizzaria.napoli", "pizzária_napoli", "napoli%00"])
+def test_restaurant_chat_rejects_invalid_restaurant_id(restaurant_id: str) -> None:
+    client = TestClient(app)
+
+    response = client.post(f"/restaurant/{restaurant_id}/chat", json={"message": "menu"})
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Restaurante nao encontrado"}
+
+
+@pytest.mark.parametrize("restaurant_id", ["", ".", "..", "../config/pizzaria_napoli"])
+def test_get_service_rejects_path_traversal(restaurant_id: str) -> None:
+    # O cliente HTTP normaliza "." e ".." na URL: testa o guard direto
+    with pytest.raises(HTTPException) as exc_info:
+        get_service(restaurant_id)
+    assert exc_info.value.status_code == 404
+
+
+@pytest.fixture
+def _menu_snapshot() -> service_module.MenuSnapshot:
+    return service_module._load_menu_snapshot(
+        {
+            "categories": [
+                {
+                    "name": "Pizzas",
+                    "products": [
+                        {"id": "calabresa", "name": "Pizza Calabresa", "price": 39.9, "description": ""}
+                    ],
+                }
+            ]
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    ("message", "expected"),
+    [
+        ("sim", service_module.IntentType.CONFIRM),
+        ("ok", service_module.IntentType.CONFIRM),
+        ("pode ser", service_module.IntentType.CONFIRM),
+        # Palavras que so contem a palavra-chave nao confirmam
+        ("Simone", service_module.IntentType.UNKNOWN),
+        ("okay", service_module.IntentType.UNKNOWN),
+        ("podemos", service_module.IntentType.UNKNOWN),
+        ("simples", service_module.IntentType.UNKNOWN),
+        # Plurais e acentos sao normalizados antes da comparacao
+        ("menus", service_module.IntentType.SHOW_MENU),
+        ("cardápios", service_module.IntentType.SHOW_MENU),
+    ],
+)
+def test_parse_intent_keywords(
+    _menu_snapshot: service_module.MenuSnapshot,
+    message: str,
+    expected: service_module.IntentType,
+) -> None:
+    intent = service_module.parse_intent(message, _menu_snapshot.item_index, _menu_snapshot.token_index)
+    assert intent.type == expected
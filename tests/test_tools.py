@@ -0,0 +1,78 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from verticals.restaurant.config_schema import RestaurantConfig
+from verticals.restaurant.tools import (
+    DAY_ORDER,
+    _parse_time,
+    calculate_total,
+    calculate_total_batch,
+    is_open,
+    is_open_batch,
+    load_config,
+)
+
+
+@pytest.fixture
+def config() -> RestaurantConfig:
+    root = Path(__file__).resolve().parents[1]
+    source = sorted((root / "verticals" / "restaurant" / "config").glob("*.json"))[0]
+    return load_config(str(source))
+
+
+@pytest.fixture
+def hours_config(config: RestaurantConfig) -> RestaurantConfig:
+    hours = dict.fromkeys(DAY_ORDER, "")
+    hours["monday"] = "18:00-02:00"
+    hours["tuesday"] = "fechado"
+    return config.model_copy(update={"opening_hours": hours})
+
+
+def test_calculate_total_batch_matches_calculate_total(config: RestaurantConfig) -> None:
+    item = next(iter(config.menu.values()))[0]
+    carts = [
+        [],
+        [{"id": item.id, "quantity": 2}],
+        [{"id": item.id, "qty": "3"}, {"id": "inexistente"}, {"quantity": 1}],
+    ]
+
+    totals = calculate_total_batch(carts, config)
+
+    assert totals == [calculate_total(cart, config) for cart in carts]
+    assert totals[0] == config.delivery_fee
+    assert totals[1] == pytest.approx(item.price * 2 + config.delivery_fee)
+
+
+def test_is_open_batch(hours_config: RestaurantConfig) -> None:
+    moments = [
+        datetime(2024, 1, 1, 17, 59),  # segunda, antes de abrir
+        datetime(2024, 1, 1, 18, 0),  # segunda, abertura
+        datetime(2024, 1, 1, 23, 59),
+        datetime(2024, 1, 2, 1, 59),  # terca, madrugada do turno de segunda
+        datetime(2024, 1, 2, 2, 0),  # terca, fechamento
+        datetime(2024, 1, 2, 20, 0),  # terca fechada
+    ]
+
+    assert is_open_batch(hours_config, moments) == [False, True, True, True, False, False]
+
+
+def test_parse_time() -> None:
+    assert _parse_time("9:00") == 9 * 60
+    assert _parse_time(" 18:30 ") == 18 * 60 + 30
+    assert _parse_time("12:0") == 12 * 60
+    assert _parse_time("24:00") is None
+    assert _parse_time("10:60") is None
+    assert _parse_time("1000") is None
+
+
+def test_is_open_overnight_interval_and_closed_day(hours_config: RestaurantConfig) -> None:
+    # Turno de segunda que vira a noite continua aberto na terca ate 02:00
+    assert is_open(hours_config, datetime(2024, 1, 1, 22, 0))
+    assert is_open(hours_config, datetime(2024, 1, 2, 1, 30))
+    assert not is_open(hours_config, datetime(2024, 1, 2, 2, 0))
+    # Terca "fechado" nao abre em nenhum horario
+    assert not any(
+        is_open(hours_config, datetime(2024, 1, 2, hour, 30)) for hour in range(3, 24)
+    )
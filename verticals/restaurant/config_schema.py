@@ -1,9 +1,12 @@
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class MenuItem(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: str
     name: str
     price: float
@@ -11,17 +14,23 @@ class MenuItem(BaseModel):
 
 
 class PromotionRule(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     trigger: str
     suggest: str
     message: str
 
 
 class UpsellRule(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     condition: str
     suggest: str
 
 
 class OpeningHours(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     monday: str
     tuesday: str
     wednesday: str
@@ -32,6 +41,8 @@ class OpeningHours(BaseModel):
 
 
 class RestaurantConfig(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     name: str
     whatsapp_number: str
     delivery_fee: float
@@ -40,3 +51,18 @@ class RestaurantConfig(BaseModel):
     menu: Dict[str, List[MenuItem]]
     promotions: List[PromotionRule]
     upsell_rules: List[UpsellRule]
+
+    # Resposta de promocoes montada uma unica vez por configuracao
+    _promotions_text: Optional[str] = PrivateAttr(default=None)
+    # Copia da configuracao com o cardapio da API: (snapshot do cardapio, copia)
+    _menu_config: Optional[Tuple[Any, "RestaurantConfig"]] = PrivateAttr(default=None)
+    # Itens do cardapio indexados por id: (cardapio indexado, indice)
+    _menu_index: Optional[Tuple[Any, Dict[str, MenuItem]]] = PrivateAttr(default=None)
+    # Minutos de funcionamento por dia da semana (0 = segunda), um bit por minuto:
+    # (horarios de origem, mascaras)
+    _open_masks: Optional[Tuple[Any, Tuple[int, ...]]] = PrivateAttr(default=None)
+    # Verificacao de horario especializada para esta configuracao: (horarios de origem, funcao)
+    _is_open_fn: Optional[Tuple[Any, Callable[[datetime], bool]]] = PrivateAttr(default=None)
+    # Cabecalho e linha da taxa de entrega da mensagem do WhatsApp:
+    # ((nome, taxa) de origem, (cabecalho, linha da taxa))
+    _message_fragments: Optional[Tuple[Tuple[str, float], Tuple[str, str]]] = PrivateAttr(default=None)
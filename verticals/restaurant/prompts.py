@@ -1,5 +1,7 @@
 ﻿from __future__ import annotations
 
+from functools import lru_cache
+
 from .config_schema import RestaurantConfig
 
 
@@ -15,5 +17,11 @@ Regras:
 """
 
 
+@lru_cache(maxsize=64)
+def _system_prompt_for(restaurant_name: str) -> str:
+    return SYSTEM_PROMPT_TEMPLATE.format(restaurant_name=restaurant_name)
+
+
 def build_system_prompt(config: RestaurantConfig) -> str:
-    return SYSTEM_PROMPT_TEMPLATE.format(restaurant_name=config.name)
+    # O prompt so depende do nome do restaurante
+    return _system_prompt_for(config.name)
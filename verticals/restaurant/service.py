@@ -11,22 +11,26 @@ from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Set, Tuple
 from urllib import error as url_error
 from urllib import request as url_request
 
 from .config_schema import MenuItem, RestaurantConfig
-from .tools import calculate_total, find_menu_item, load_config
+from .tools import _entry_quantity, _index_menu_items, _menu_index, load_config
 from services.menu_api_client import get_menu
 
 load_dotenv()
 
-MENU_KEYWORDS = {"menu", "cardapio"}
-PROMO_KEYWORDS = {"promo", "promocao", "promocoes"}
-FINISH_KEYWORDS = {"finalizar", "fechar", "encerrar", "checkout"}
-CONFIRM_KEYWORDS = {"sim", "confirmar", "confirmo", "ok", "pode"}
-EDIT_KEYWORDS = {"editar", "mudar", "alterar", "nao", "cancelar", "voltar"}
-REMOVE_KEYWORDS = {"remover", "tirar", "excluir", "deletar"}
+MENU_KEYWORDS = frozenset({"menu", "cardapio"})
+PROMO_KEYWORDS = frozenset({"promo", "promocao", "promocoes"})
+FINISH_KEYWORDS = frozenset({"finalizar", "fechar", "encerrar", "checkout"})
+CONFIRM_KEYWORDS = frozenset({"sim", "confirmar", "confirmo", "ok", "pode"})
+EDIT_KEYWORDS = frozenset({"editar", "mudar", "alterar", "nao", "cancelar", "voltar"})
+REMOVE_KEYWORDS = frozenset({"remover", "tirar", "excluir", "deletar"})
+
+# Flags do formato antigo do state, substituidas por "step"
+LEGACY_STATE_KEYS = ("awaiting_confirmation", "awaiting_info", "confirmed")
 
 NUMBER_WORDS = {
     "um": 1,
@@ -60,6 +64,15 @@ GENERIC_ITEM_TOKENS = {
     "media",
     "grande",
 }
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_NON_DIGIT_RE = re.compile(r"\D+")
+_QTY_X_RE = re.compile(r"\b(\d+)\s*x\b")
+_NAME_RE = re.compile(r"\b(meu nome e|me chamo|sou)\s+(.+)")
+# "refri" tambem cobre "refrigerante"
+_BEVERAGE_CATEGORY_RE = re.compile(r"bebida|drink|refri")
+_ADDR_RE = re.compile(r"\b(endereco|endereço)\s*(e|é|:)?\s+(.+)", re.IGNORECASE)
+
 ORDER_CREATE_URL_DEFAULT = "https://pizzaria-demo.onrender.com/orders/public"
 CHECKOUT_URL_DEFAULT = "https://pizzaria-demo.onrender.com/api/orders/checkout"
 
@@ -67,6 +80,7 @@ CHECKOUT_URL_DEFAULT = "https://pizzaria-demo.onrender.com/api/orders/checkout"
 #CHECKOUT_URL_DEFAULT = "http://localhost:8000/api/orders/checkout"
 
 logger = logging.getLogger(__name__)
+_menu_snapshot_cache: Optional[Tuple[Any, MenuSnapshot]] = None
 
 
 def get_restaurant_id() -> Optional[str]:
@@ -94,23 +108,48 @@ class IntentType(str, Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Intent:
     type: IntentType
     item: Optional[MenuItem] = None
     quantity: int = 1
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IndexedItem:
     item: MenuItem
     category: str
     id_norm: str
     name_norm: str
     tokens: Tuple[str, ...]
+    tokens_singular: FrozenSet[str]
+    # tokens no singular do nome e do id, usados para achar a quantidade
+    match_tokens: FrozenSet[str]
+
+
+@dataclass(frozen=True, slots=True)
+class TokenIndex:
+    # token no singular -> posicoes dos itens que o contem
+    exact: Dict[str, FrozenSet[int]]
+    # prefixo (4+ letras) de um token no singular -> posicoes dos itens
+    prefixes: Dict[str, FrozenSet[int]]
+
+
+@dataclass(frozen=True, slots=True)
+class MenuSnapshot:
+    menu: Dict[str, List[MenuItem]]
+    item_index: Tuple[IndexedItem, ...]
+    token_index: TokenIndex
+    id_to_item: Dict[str, MenuItem]
+    beverage_ids: FrozenSet[str]
+    first_beverage: Optional[MenuItem]
+    menu_text: str
 
 
 def _strip_accents(text: str) -> str:
+    # Texto ASCII nao tem acentos nem marcas combinantes para remover
+    if text.isascii():
+        return text
     return "".join(
         char
         for char in unicodedata.normalize("NFD", text)
@@ -119,9 +158,7 @@ def _strip_accents(text: str) -> str:
 
 
 def _normalize_text(text: str) -> str:
-    text = _strip_accents(text.lower())
-    text = re.sub(r"[^a-z0-9]+", " ", text)
-    return text.strip()
+    return _NON_ALNUM_RE.sub(" ", _strip_accents(text.lower())).strip()
 
 
 def _tokenize(text: str) -> List[str]:
@@ -136,15 +173,12 @@ def _singularize(token: str) -> str:
 
 
 def _token_matches_item(token: str, item_token: str) -> bool:
-    token = _singularize(token)
-    item_token = _singularize(item_token)
-    if token == item_token:
-        return True
-    if len(token) > 3 and item_token.startswith(token):
-        return True
-    if len(item_token) > 3 and token.startswith(item_token):
-        return True
-    return False
+    # Os dois tokens ja chegam no singular
+    return (
+        token == item_token
+        or (len(token) > 3 and item_token.startswith(token))
+        or (len(item_token) > 3 and token.startswith(item_token))
+    )
 
 
 def _format_price(value: Any) -> str:
@@ -218,7 +252,8 @@ def _build_menu_from_api(menu_data: Optional[dict] = None) -> Dict[str, List[Men
         raw_id = product.get("id")
         item_id = str(raw_id) if raw_id is not None else item_name
         description = str(product.get("description") or "").strip()
-        return MenuItem(
+        # Os campos ja chegam convertidos para os tipos do schema: dispensa a revalidacao
+        return MenuItem.model_construct(
             id=item_id,
             name=item_name,
             price=price,
@@ -309,26 +344,7 @@ def _build_menu_from_api(menu_data: Optional[dict] = None) -> Dict[str, List[Men
 
 
 def _build_item_index(config: RestaurantConfig) -> List[IndexedItem]:
-    items: List[IndexedItem] = []
-    for category, entries in config.menu.items():
-        for item in entries:
-            id_norm = _normalize_text(item.id)
-            name_norm = _normalize_text(item.name)
-            tokens = tuple(
-                token
-                for token in _tokenize(item.name)
-                if token not in GENERIC_ITEM_TOKENS
-            )
-            items.append(
-                IndexedItem(
-                    item=item,
-                    category=category,
-                    id_norm=id_norm,
-                    name_norm=name_norm,
-                    tokens=tokens,
-                )
-            )
-    return items
+    return _build_item_index_from_menu(config.menu)
 
 
 def _build_item_index_from_menu(menu: Dict[str, List[MenuItem]]) -> List[IndexedItem]:
@@ -342,6 +358,7 @@ def _build_item_index_from_menu(menu: Dict[str, List[MenuItem]]) -> List[Indexed
                 for token in _tokenize(item.name)
                 if token not in GENERIC_ITEM_TOKENS
             )
+            tokens_singular = frozenset(_singularize(token) for token in tokens)
             items.append(
                 IndexedItem(
                     item=item,
@@ -349,11 +366,29 @@ def _build_item_index_from_menu(menu: Dict[str, List[MenuItem]]) -> List[Indexed
                     id_norm=id_norm,
                     name_norm=name_norm,
                     tokens=tokens,
+                    tokens_singular=tokens_singular,
+                    match_tokens=(
+                        tokens_singular | {_singularize(id_norm)} if id_norm else tokens_singular
+                    ),
                 )
             )
     return items
 
 
+def _build_token_index(indexed_items: Sequence[IndexedItem]) -> TokenIndex:
+    exact: Dict[str, Set[int]] = {}
+    prefixes: Dict[str, Set[int]] = {}
+    for position, indexed in enumerate(indexed_items):
+        for token in indexed.tokens_singular:
+            exact.setdefault(token, set()).add(position)
+            for end in range(4, len(token) + 1):
+                prefixes.setdefault(token[:end], set()).add(position)
+    return TokenIndex(
+        exact={token: frozenset(positions) for token, positions in exact.items()},
+        prefixes={prefix: frozenset(positions) for prefix, positions in prefixes.items()},
+    )
+
+
 def _build_item_index_from_api(menu_data: Optional[dict] = None) -> List[IndexedItem]:
     menu = _build_menu_from_api(menu_data)
     if not menu:
@@ -361,8 +396,62 @@ def _build_item_index_from_api(menu_data: Optional[dict] = None) -> List[Indexed
     return _build_item_index_from_menu(menu)
 
 
-def _menu_text(config: RestaurantConfig) -> str:
-    return _menu_text_from_menu(config.menu)
+def _load_menu_snapshot(menu_data: Optional[dict]) -> MenuSnapshot:
+    # O cliente da API devolve o mesmo payload enquanto o cache dele for valido,
+    # entao o cardapio e os indices so sao reconstruidos quando o payload muda.
+    # Sem payload (API fora do ar) o snapshot vazio tambem fica em cache.
+    global _menu_snapshot_cache
+    cached = _menu_snapshot_cache
+    if cached is not None and cached[0] is menu_data:
+        return cached[1]
+
+    api_menu = _build_menu_from_api(menu_data if menu_data is not None else {})
+    if api_menu.get("categories") == [] and len(api_menu) == 1:
+        menu: Dict[str, List[MenuItem]] = {}
+        item_index: Tuple[IndexedItem, ...] = ()
+    else:
+        menu = api_menu
+        item_index = tuple(_build_item_index_from_menu(menu))
+
+    snapshot = MenuSnapshot(
+        menu=menu,
+        item_index=item_index,
+        token_index=_build_token_index(item_index),
+        id_to_item=_index_menu_items(menu),
+        beverage_ids=_beverage_ids(item_index),
+        first_beverage=_find_beverage_item(item_index),
+        menu_text=_menu_text_from_menu(menu),
+    )
+    _menu_snapshot_cache = (menu_data, snapshot)
+    return snapshot
+
+
+def _config_with_menu(config: RestaurantConfig, snapshot: MenuSnapshot) -> RestaurantConfig:
+    # A configuracao e imutavel: o cardapio da API entra numa copia, criada
+    # uma vez por snapshot do cardapio.
+    cached = config._menu_config
+    if cached is not None and cached[0] is snapshot:
+        return cached[1]
+    menu_config = config.model_copy(update={"menu": snapshot.menu})
+    # model_copy leva os atributos privados: sem limpar, cada copia apontaria
+    # para a anterior e a cadeia de copias nunca seria liberada
+    menu_config._menu_config = None
+    config._menu_config = (snapshot, menu_config)
+    return menu_config
+
+
+def _promotions_text(config: RestaurantConfig) -> str:
+    text = config._promotions_text
+    if text is None:
+        if config.promotions:
+            promo_lines = ["Promocoes de hoje:"]
+            for promo in config.promotions:
+                promo_lines.append(f"• {promo.message}")
+            text = "\n".join(promo_lines)
+        else:
+            text = "No momento nao temos promocoes ativas."
+        config._promotions_text = text
+    return text
 
 
 def _menu_is_empty(menu: Dict[str, List[MenuItem]]) -> bool:
@@ -371,10 +460,23 @@ def _menu_is_empty(menu: Dict[str, List[MenuItem]]) -> bool:
     return all(not items for items in menu.values())
 
 
-def _match_item(text: str, indexed_items: List[IndexedItem]) -> Optional[IndexedItem]:
-    normalized_text = _normalize_text(text)
-    tokens = _tokenize(text)
+def _positions_for_token(token: str, token_index: TokenIndex) -> AbstractSet[int]:
+    # Mesmo criterio de _token_matches_item: igualdade, ou prefixo quando o
+    # token mais curto tem mais de 3 letras.
+    if len(token) <= 3:
+        return token_index.exact.get(token, frozenset())
+    positions = set(token_index.prefixes.get(token, ()))
+    for end in range(4, len(token)):
+        positions.update(token_index.exact.get(token[:end], ()))
+    return positions
 
+
+def _match_item(
+    normalized_text: str,
+    singular_tokens: List[str],
+    indexed_items: Sequence[IndexedItem],
+    token_index: TokenIndex,
+) -> Optional[IndexedItem]:
     for indexed in indexed_items:
         if indexed.id_norm and indexed.id_norm in normalized_text:
             return indexed
@@ -383,15 +485,15 @@ def _match_item(text: str, indexed_items: List[IndexedItem]) -> Optional[Indexed
         if indexed.name_norm and indexed.name_norm in normalized_text:
             return indexed
 
+    scores: Counter[int] = Counter()
+    for token in singular_tokens:
+        scores.update(_positions_for_token(token, token_index))
+
     best_score = 0
     best_item: Optional[IndexedItem] = None
-    for indexed in indexed_items:
-        if not indexed.tokens:
-            continue
-        matches = 0
-        for token in tokens:
-            if any(_token_matches_item(token, item_token) for item_token in indexed.tokens):
-                matches += 1
+    for position in sorted(scores):
+        indexed = indexed_items[position]
+        matches = scores[position]
         if matches >= max(1, min(2, len(indexed.tokens))) and matches > best_score:
             best_score = matches
             best_item = indexed
@@ -399,59 +501,59 @@ def _match_item(text: str, indexed_items: List[IndexedItem]) -> Optional[Indexed
     return best_item
 
 
-def _quantity_from_tokens(tokens: List[str]) -> Optional[int]:
-    for token in tokens:
+def _quantity_from_tokens(singular_tokens: List[str]) -> Optional[int]:
+    for token in singular_tokens:
         if token.isdigit():
             return max(int(token), 1)
-        token = _singularize(token)
         if token in NUMBER_WORDS:
             return NUMBER_WORDS[token]
     return None
 
 
-def _extract_quantity(text: str, indexed: Optional[IndexedItem]) -> int:
-    tokens = _tokenize(text)
-    if not tokens:
+def _extract_quantity(
+    normalized_text: str,
+    singular_tokens: List[str],
+    indexed: Optional[IndexedItem],
+) -> int:
+    if not singular_tokens:
         return 1
 
     if indexed:
-        item_tokens = list(indexed.tokens) + [indexed.id_norm]
-        for i, token in enumerate(tokens):
-            if any(_token_matches_item(token, item_token) for item_token in item_tokens if item_token):
+        for i, token in enumerate(singular_tokens):
+            if any(_token_matches_item(token, item_token) for item_token in indexed.match_tokens):
                 window_start = max(0, i - 2)
-                qty = _quantity_from_tokens(tokens[window_start:i])
+                qty = _quantity_from_tokens(singular_tokens[window_start:i])
                 if qty:
                     return qty
 
-    match = re.search(r"\b(\d+)\s*x\b", _normalize_text(text))
+    match = _QTY_X_RE.search(normalized_text)
     if match:
         return max(int(match.group(1)), 1)
 
-    qty = _quantity_from_tokens(tokens)
+    qty = _quantity_from_tokens(singular_tokens)
     return qty or 1
 
 
 def _looks_like_phone(value: str) -> bool:
-    digits = re.sub(r"\D+", "", value)
-    return 10 <= len(digits) <= 13
+    return 10 <= len(_NON_DIGIT_RE.sub("", value)) <= 13
 
 
 def _normalize_phone(value: str) -> Optional[str]:
-    digits = re.sub(r"\D+", "", value)
+    digits = _NON_DIGIT_RE.sub("", value)
     if 10 <= len(digits) <= 13:
         return digits
     return None
 
 
 def _extract_name(text: str) -> Optional[str]:
-    match = re.search(r"\b(meu nome e|me chamo|sou)\s+(.+)", _normalize_text(text))
+    match = _NAME_RE.search(_normalize_text(text))
     if match:
         return match.group(2).strip().title()
     return None
 
 
 def _extract_address(text: str) -> Optional[str]:
-    match = re.search(r"\b(endereco|endereço)\s*(e|é|:)?\s+(.+)", text, re.IGNORECASE)
+    match = _ADDR_RE.search(text)
     if match:
         return match.group(3).strip()
     return None
@@ -488,12 +590,6 @@ def _closed_message(config: RestaurantConfig, now: datetime) -> str:
     return "Estamos fechados agora."
 
 
-def _response_with_notice(text: str, notice: Optional[str]) -> str:
-    if not notice:
-        return text
-    return f"{notice}\n\n{text}"
-
-
 def _create_order(payload: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
     api_key = os.getenv("INTERNAL_API_KEY", "")
     if not api_key:
@@ -621,28 +717,38 @@ def _create_checkout(order_id: int) -> Tuple[Optional[str], Optional[str]]:
     return checkout_url, None
 
 
-def parse_intent(message: str, indexed_items: List[IndexedItem]) -> Intent:
-    text = _normalize_text(message)
-    tokens = set(text.split())
+def parse_intent(
+    message: str,
+    indexed_items: Sequence[IndexedItem],
+    token_index: Optional[TokenIndex] = None,
+) -> Intent:
+    normalized = _normalize_text(message)
+    tokens = normalized.split()
+    singular_tokens = [_singularize(token) for token in tokens]
+    # Palavras-chave sao palavras inteiras; a forma no singular cobre plurais como "menus"
+    token_set = set(tokens)
+    token_set.update(singular_tokens)
 
-    if "novo pedido" in text:
+    if "novo pedido" in normalized:
         return Intent(IntentType.NEW_ORDER)
 
-    if tokens & MENU_KEYWORDS or any(keyword in text for keyword in MENU_KEYWORDS):
+    if token_set & MENU_KEYWORDS:
         return Intent(IntentType.SHOW_MENU)
-    if tokens & PROMO_KEYWORDS or any(keyword in text for keyword in PROMO_KEYWORDS):
+    if token_set & PROMO_KEYWORDS:
         return Intent(IntentType.SHOW_PROMOS)
-    if tokens & FINISH_KEYWORDS or any(keyword in text for keyword in FINISH_KEYWORDS):
+    if token_set & FINISH_KEYWORDS:
         return Intent(IntentType.FINISH)
-    if tokens & CONFIRM_KEYWORDS or any(keyword in text for keyword in CONFIRM_KEYWORDS):
+    if token_set & CONFIRM_KEYWORDS:
         return Intent(IntentType.CONFIRM)
-    if tokens & EDIT_KEYWORDS or any(keyword in text for keyword in EDIT_KEYWORDS):
+    if token_set & EDIT_KEYWORDS:
         return Intent(IntentType.EDIT)
 
-    indexed = _match_item(message, indexed_items)
+    if token_index is None:
+        token_index = _build_token_index(indexed_items)
+    indexed = _match_item(normalized, singular_tokens, indexed_items, token_index)
     if indexed:
-        quantity = _extract_quantity(message, indexed)
-        if tokens & REMOVE_KEYWORDS or any(keyword in text for keyword in REMOVE_KEYWORDS):
+        quantity = _extract_quantity(normalized, singular_tokens, indexed)
+        if token_set & REMOVE_KEYWORDS:
             return Intent(IntentType.REMOVE_ITEM, indexed.item, quantity)
         return Intent(IntentType.ADD_ITEM, indexed.item, quantity)
 
@@ -650,81 +756,96 @@ def parse_intent(message: str, indexed_items: List[IndexedItem]) -> Intent:
 
 
 class CartManager:
-    def __init__(self, config: RestaurantConfig, cart_state: List[Dict[str, Any]]) -> None:
+    def __init__(
+        self,
+        config: RestaurantConfig,
+        cart_state: List[Dict[str, Any]],
+        id_to_item: Optional[Dict[str, MenuItem]] = None,
+    ) -> None:
         self.config = config
         self.cart_state = cart_state
+        if id_to_item is None:
+            id_to_item = _menu_index(config)
+        self._id_to_item = id_to_item
+        # Carrinho indexado por id; cart_state (lista salva no state) so e
+        # regravado quando o carrinho muda.
+        self._qty: Dict[str, int] = {}
+        for entry in cart_state:
+            item_id = entry.get("id")
+            if not item_id:
+                continue
+            self._qty[item_id] = self._qty.get(item_id, 0) + _entry_quantity(entry)
+
+    def _sync_state(self) -> None:
+        self.cart_state[:] = [
+            {"id": item_id, "quantity": quantity} for item_id, quantity in self._qty.items()
+        ]
 
     def add(self, item_id: str, quantity: int) -> None:
         quantity = max(int(quantity), 1)
-        for entry in self.cart_state:
-            if entry.get("id") == item_id:
-                entry["quantity"] = int(entry.get("quantity", 1)) + quantity
-                return
-        self.cart_state.append({"id": item_id, "quantity": quantity})
+        self._qty[item_id] = self._qty.get(item_id, 0) + quantity
+        self._sync_state()
 
     def remove(self, item_id: str, quantity: int) -> bool:
+        current = self._qty.get(item_id)
+        if current is None:
+            return False
         quantity = max(int(quantity), 1)
-        for entry in list(self.cart_state):
-            if entry.get("id") == item_id:
-                current = int(entry.get("quantity", 1))
-                if quantity >= current:
-                    self.cart_state.remove(entry)
-                else:
-                    entry["quantity"] = current - quantity
-                return True
-        return False
+        if quantity >= current:
+            del self._qty[item_id]
+        else:
+            self._qty[item_id] = current - quantity
+        self._sync_state()
+        return True
 
-    def has_items(self) -> bool:
-        for entry in self.cart_state:
-            item_id = entry.get("id")
-            if not item_id:
+    def _enumerate_cart(self) -> Iterator[Tuple[MenuItem, int, float]]:
+        for item_id, quantity in self._qty.items():
+            item = self._id_to_item.get(item_id)
+            if item is None:
                 continue
-            if find_menu_item(self.config, item_id) is not None:
-                return True
-        return False
+            yield item, quantity, item.price * quantity
+
+    def has_items(self) -> bool:
+        return any(item_id in self._id_to_item for item_id in self._qty)
 
     def items(self) -> List[Tuple[MenuItem, int]]:
-        result: List[Tuple[MenuItem, int]] = []
-        for entry in self.cart_state:
-            item_id = entry.get("id")
-            if not item_id:
-                continue
-            item = find_menu_item(self.config, item_id)
-            if item is None:
-                continue
-            quantity = max(int(entry.get("quantity", 1)), 1)
-            result.append((item, quantity))
-        return result
+        return [(item, quantity) for item, quantity, _subtotal in self._enumerate_cart()]
+
+    def _items_total(self) -> float:
+        # Soma unica usada pelo total parcial e pelo resumo do pedido
+        items_total = 0.0
+        for _item, _quantity, subtotal in self._enumerate_cart():
+            items_total += subtotal
+        return items_total
 
     def total(self) -> float:
-        return calculate_total(self.cart_state, self.config)
+        return self._items_total() + self.config.delivery_fee
 
     def summary_text(self) -> str:
         lines: List[str] = ["Resumo do pedido:"]
-        for item, quantity in self.items():
-            subtotal = item.price * quantity
+        for item, quantity, subtotal in self._enumerate_cart():
             lines.append(f"• {quantity}x {item.name} — R$ {subtotal:.2f}")
-        lines.append(f"Taxa de entrega: R$ {float(self.config.delivery_fee):.2f}")
-        lines.append(f"Total: R$ {self.total():.2f}")
+        items_total = self._items_total()
+        delivery_fee = self.config.delivery_fee
+        lines.append(f"Taxa de entrega: R$ {delivery_fee:.2f}")
+        lines.append(f"Total: R$ {items_total + delivery_fee:.2f}")
         return "\n".join(lines)
 
-    def has_beverage(self, item_index: List[IndexedItem]) -> bool:
-        for entry in self.cart_state:
-            item_id = entry.get("id")
-            if not item_id:
-                continue
-            for indexed in item_index:
-                if indexed.item.id == item_id and _is_beverage_category(indexed.category):
-                    return True
-        return False
+    def has_beverage(self, beverage_ids: AbstractSet[str]) -> bool:
+        return not self._qty.keys().isdisjoint(beverage_ids)
 
 
 def _is_beverage_category(category: str) -> bool:
-    label = category.lower()
-    return "bebida" in label or "drink" in label or "refri" in label or "refrigerante" in label
+    return _BEVERAGE_CATEGORY_RE.search(category.lower()) is not None
+
+
+def _beverage_ids(item_index: Sequence[IndexedItem]) -> FrozenSet[str]:
+    return frozenset(
+        indexed.item.id for indexed in item_index if _is_beverage_category(indexed.category)
+    )
 
 
-def _find_beverage_item(item_index: List[IndexedItem]) -> Optional[MenuItem]:
+def _find_beverage_item(item_index: Sequence[IndexedItem]) -> Optional[MenuItem]:
     for indexed in item_index:
         if _is_beverage_category(indexed.category):
             return indexed.item
@@ -753,44 +874,36 @@ def _coerce_step(state: Dict[str, Any]) -> ConversationStep:
 
 class ConversationManager:
     def __init__(self, config: RestaurantConfig, state: Dict[str, Any], restaurant_slug: str) -> None:
-        self.config = config
+        self.base_config = config
         self.state = state
         self.restaurant_slug = restaurant_slug
-        self.cart = CartManager(config, state.setdefault("cart", []))
+        self.reload_menu_index()
+        self.cart = CartManager(self.config, state.setdefault("cart", []), self.id_to_item)
         self.customer_info: Dict[str, Any] = state.setdefault("customer_info", {})
-        menu_data = get_menu()
-        api_menu = _build_menu_from_api(menu_data)
-        if api_menu.get("categories") == [] and len(api_menu) == 1:
-            self.config.menu = {}
-            self.item_index = []
-        else:
-            self.config.menu = api_menu
-            self.item_index = _build_item_index_from_menu(self.config.menu) if self.config.menu else []
-        print("[assistant] item index carregado da API")
 
         self.step = _coerce_step(state)
         self.state["step"] = self.step.value
 
         # Limpa flags antigas para manter o estado consistente
-        self.state.pop("awaiting_confirmation", None)
-        self.state.pop("awaiting_info", None)
-        self.state.pop("confirmed", None)
+        for legacy_key in LEGACY_STATE_KEYS:
+            if legacy_key in self.state:
+                del self.state[legacy_key]
 
         self.closed_notice = None
 
     def reload_menu_index(self) -> None:
-        menu_data = get_menu()
-        api_menu = _build_menu_from_api(menu_data)
-        if api_menu.get("categories") == [] and len(api_menu) == 1:
-            self.config.menu = {}
-            self.item_index = []
-        else:
-            self.config.menu = api_menu
-            self.item_index = _build_item_index_from_menu(self.config.menu) if self.config.menu else []
+        snapshot = _load_menu_snapshot(get_menu())
+        self.config = _config_with_menu(self.base_config, snapshot)
+        self.item_index = snapshot.item_index
+        self.token_index = snapshot.token_index
+        self.id_to_item = snapshot.id_to_item
+        self.beverage_ids = snapshot.beverage_ids
+        self.first_beverage = snapshot.first_beverage
+        self.menu_text = snapshot.menu_text
         print("[assistant] item index carregado da API")
 
     def handle_message(self, message: str) -> Dict[str, Any]:
-        intent = parse_intent(message, self.item_index)
+        intent = parse_intent(message, self.item_index, self.token_index)
 
         if intent.type == IntentType.NEW_ORDER:
             return self._start_new_order()
@@ -889,7 +1002,7 @@ class ConversationManager:
         self.state["customer_info"] = {}
         self.step = ConversationStep.ORDERING
         self.state["step"] = self.step.value
-        self.cart = CartManager(self.config, self.state["cart"])
+        self.cart = CartManager(self.config, self.state["cart"], self.id_to_item)
         self.customer_info = self.state["customer_info"]
         return self._build_response(
             "Perfeito! Vamos comecar um novo pedido.\n"
@@ -934,15 +1047,11 @@ class ConversationManager:
                 return self._build_response("Nenhum produto cadastrado no momento.")
 
         if intent.type == IntentType.SHOW_MENU:
-            return self._build_response(_menu_text(self.config))
+            return self._build_response(self.menu_text)
 
         if intent.type == IntentType.SHOW_PROMOS:
-            if self.config.promotions:
-                promo_lines = ["Promocoes de hoje:"]
-                for promo in self.config.promotions:
-                    promo_lines.append(f"• {promo.message}")
-                return self._build_response("\n".join(promo_lines))
-            return self._build_response("No momento nao temos promocoes ativas.")
+            # Guardado na configuracao base: as copias com o cardapio da API mudam a cada payload
+            return self._build_response(_promotions_text(self.base_config))
 
         if intent.type == IntentType.ADD_ITEM and intent.item:
             self.cart.add(intent.item.id, intent.quantity)
@@ -956,8 +1065,8 @@ class ConversationManager:
                 if promo.trigger == intent.item.id:
                     response_lines.append(promo.message)
 
-            if not self.cart.has_beverage(self.item_index):
-                beverage = _find_beverage_item(self.item_index)
+            if not self.cart.has_beverage(self.beverage_ids):
+                beverage = self.first_beverage
                 if beverage:
                     response_lines.append(
                         f"Quer adicionar {beverage.name} por R$ {beverage.price:.2f} para completar seu pedido?"
@@ -1079,7 +1188,7 @@ class ConversationManager:
             "customer_phone": normalized_phone,
             "session_id": self.state.get("session_id"),
             "restaurant_id": int(restaurant_id),
-            "delivery_fee": float(self.config.delivery_fee),
+            "delivery_fee": self.config.delivery_fee,
             "items": items_payload,
         }
 
@@ -1112,7 +1221,7 @@ class ConversationManager:
         checkout_url: Optional[str] = None,
         buttons: Optional[List[Dict[str, str]]] = None,
     ) -> Dict[str, Any]:
-        final_text = _response_with_notice(text, self.closed_notice)
+        final_text = f"{self.closed_notice}\n\n{text}" if self.closed_notice else text
         payload: Dict[str, Any] = {
             "text": final_text,
             "message": final_text,
@@ -1,6 +1,7 @@
-﻿import json
-from datetime import datetime, time
-from typing import Any, Dict, List, Optional, Tuple
+﻿from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .config_schema import MenuItem, RestaurantConfig
 
@@ -14,23 +15,41 @@ DAY_ORDER = [
     "saturday",
     "sunday",
 ]
+# Indices de datetime.weekday(): 0 = segunda
+NEXT_DAY = tuple((weekday + 1) % 7 for weekday in range(7))
 
 
 def load_config(config_path: str) -> RestaurantConfig:
-    with open(config_path, "r", encoding="utf-8") as file:
-        data = json.load(file)
-    return RestaurantConfig(**data)
-
-
-def _parse_time(value: str) -> Optional[time]:
-    try:
-        return datetime.strptime(value.strip(), "%H:%M").time()
-    except ValueError:
+    # Cada versao do arquivo e carregada uma vez: main.py guarda o servico por mtime
+    with open(config_path, "rb") as file:
+        config = RestaurantConfig.model_validate_json(file.read())
+    # Estruturas derivadas montadas junto com a configuracao
+    _is_open_checker(config)
+    _message_fragments(config)
+    return config
+
+
+def _parse_time(value: str) -> Optional[int]:
+    # "H:MM"/"HH:MM" em minutos do dia, com os mesmos limites de strptime("%H:%M")
+    hour_text, separator, minute_text = value.strip().partition(":")
+    if (
+        not separator
+        or not 0 < len(hour_text) <= 2
+        or not 0 < len(minute_text) <= 2
+        or not (hour_text + minute_text).isascii()
+        or not (hour_text + minute_text).isdigit()
+    ):
+        return None
+    hour = int(hour_text)
+    minute = int(minute_text)
+    if hour > 23 or minute > 59:
         return None
+    return hour * 60 + minute
 
 
-def _parse_intervals(hours: str) -> List[Tuple[time, time]]:
-    intervals: List[Tuple[time, time]] = []
+@lru_cache(maxsize=512)
+def _parse_intervals(hours: str) -> Tuple[Tuple[int, int], ...]:
+    intervals: List[Tuple[int, int]] = []
     for raw_interval in hours.split(","):
         interval = raw_interval.strip()
         if not interval or "-" not in interval:
@@ -41,76 +60,152 @@ def _parse_intervals(hours: str) -> List[Tuple[time, time]]:
         if start is None or end is None:
             continue
         intervals.append((start, end))
-    return intervals
+    return tuple(intervals)
+
+
+def _minutes_mask(start: int, end: int) -> int:
+    # Bits de start ate end - 1 ligados
+    return (1 << end) - (1 << start)
+
+
+def _open_masks(config: RestaurantConfig) -> Tuple[int, ...]:
+    # Monta uma vez por configuracao uma mascara de 1440 bits por dia da semana
+    # (indice de datetime.weekday), com o bit m ligado quando o restaurante esta
+    # aberto no minuto m. Intervalos que viram a noite ligam [inicio, 1440) e
+    # [0, fim) no proprio dia e [0, fim) no dia seguinte.
+    cached = config._open_masks
+    if cached is not None and cached[0] is config.opening_hours:
+        return cached[1]
+    masks = [0] * len(DAY_ORDER)
+    for weekday, day_key in enumerate(DAY_ORDER):
+        hours = config.opening_hours.get(day_key, "")
+        normalized = hours.strip().lower()
+        if not normalized or normalized in {"closed", "fechado"}:
+            continue
+        next_weekday = NEXT_DAY[weekday]
+        for start, end in _parse_intervals(hours):
+            if end <= start:
+                masks[weekday] |= _minutes_mask(start, 1440) | _minutes_mask(0, end)
+                masks[next_weekday] |= _minutes_mask(0, end)
+            else:
+                masks[weekday] |= _minutes_mask(start, end)
+    result = tuple(masks)
+    config._open_masks = (config.opening_hours, result)
+    return result
 
 
-def _is_open_for_hours(hours: str, now_time: time) -> bool:
-    normalized = hours.strip().lower()
-    if not normalized or normalized in {"closed", "fechado"}:
-        return False
-    for start, end in _parse_intervals(hours):
-        if end <= start:
-            if now_time >= start or now_time < end:
-                return True
-        elif start <= now_time < end:
-            return True
-    return False
+def _is_open_checker(config: RestaurantConfig) -> Callable[[datetime], bool]:
+    # Gera uma funcao por configuracao com as mascaras presas no closure,
+    # sem consultar a configuracao a cada chamada
+    cached = config._is_open_fn
+    if cached is not None and cached[0] is config.opening_hours:
+        return cached[1]
+    masks = _open_masks(config)
 
+    def check(now: datetime) -> bool:
+        return bool(masks[now.weekday()] >> (now.hour * 60 + now.minute) & 1)
 
-def _is_open_from_prev_day(hours: str, now_time: time) -> bool:
-    if not hours:
-        return False
-    for start, end in _parse_intervals(hours):
-        if end <= start and now_time < end:
-            return True
-    return False
+    config._is_open_fn = (config.opening_hours, check)
+    return check
 
 
-def _previous_day(day_key: str) -> Optional[str]:
-    if day_key not in DAY_ORDER:
-        return None
-    index = DAY_ORDER.index(day_key)
-    return DAY_ORDER[index - 1]
+def is_open(config: RestaurantConfig, now: datetime) -> bool:
+    return _is_open_checker(config)(now)
 
 
-def is_open(config: RestaurantConfig, now: datetime) -> bool:
-    day_key = now.strftime("%A").lower()
-    now_time = now.time()
-    hours_today = config.opening_hours.get(day_key, "")
-    if _is_open_for_hours(hours_today, now_time):
-        return True
-    prev_day = _previous_day(day_key)
-    if not prev_day:
-        return False
-    hours_prev = config.opening_hours.get(prev_day, "")
-    return _is_open_from_prev_day(hours_prev, now_time)
+def is_open_batch(config: RestaurantConfig, moments: Iterable[datetime]) -> List[bool]:
+    # Consulta em lote (ex.: relatorios de horario): verificacao resolvida uma vez
+    check = _is_open_checker(config)
+    return [check(now) for now in moments]
 
 
-def find_menu_item(config: RestaurantConfig, item_id: str) -> Optional[MenuItem]:
-    for items in config.menu.values():
+def _index_menu_items(menu: Dict[str, List[MenuItem]]) -> Dict[str, MenuItem]:
+    index: Dict[str, MenuItem] = {}
+    for items in menu.values():
         for item in items:
-            if item.id == item_id:
-                return item
-    return None
+            # Mantem o primeiro item com o id, como na busca linear
+            index.setdefault(item.id, item)
+    return index
 
 
-def calculate_total(cart: List[Dict[str, Any]], config: RestaurantConfig) -> float:
-    total = 0.0
+def _menu_index(config: RestaurantConfig) -> Dict[str, MenuItem]:
+    # model_copy leva os atributos privados junto, entao o indice guarda o
+    # cardapio de origem e e refeito quando a copia troca o cardapio
+    cached = config._menu_index
+    if cached is not None and cached[0] is config.menu:
+        return cached[1]
+    index = _index_menu_items(config.menu)
+    config._menu_index = (config.menu, index)
+    return index
+
+
+def find_menu_item(config: RestaurantConfig, item_id: str) -> Optional[MenuItem]:
+    return _menu_index(config).get(item_id)
+
+
+def _entry_quantity(entry: Dict[str, Any]) -> int:
+    qty = entry["quantity"] if "quantity" in entry else entry.get("qty", 1)
+    # Caminho rapido: quantidade que ja veio como int do JSON dispensa o try
+    if type(qty) is not int:
+        try:
+            qty = int(qty)
+        except (TypeError, ValueError):
+            return 1
+    return qty if qty > 1 else 1
+
+
+@dataclass(frozen=True, slots=True)
+class _CartView:
+    # Carrinho em colunas paralelas: itens do cardapio ja resolvidos e quantidades (>= 1)
+    items: List[MenuItem]
+    quantities: List[int]
+
+
+def _to_soa(cart: List[Dict[str, Any]], index: Dict[str, MenuItem]) -> _CartView:
+    items: List[MenuItem] = []
+    quantities: List[int] = []
     for entry in cart:
         item_id = entry.get("id")
         if not item_id:
             continue
-        qty = entry.get("quantity", entry.get("qty", 1))
-        try:
-            quantity = int(qty)
-        except (TypeError, ValueError):
-            quantity = 1
-        quantity = max(quantity, 1)
-        item = find_menu_item(config, item_id)
+        item = index.get(item_id)
         if item is None:
             continue
+        items.append(item)
+        quantities.append(_entry_quantity(entry))
+    return _CartView(items, quantities)
+
+
+def _items_total(view: _CartView) -> float:
+    total = 0.0
+    for item, quantity in zip(view.items, view.quantities):
         total += item.price * quantity
-    return total + float(config.delivery_fee)
+    return total
+
+
+def calculate_total(cart: List[Dict[str, Any]], config: RestaurantConfig) -> float:
+    return _items_total(_to_soa(cart, _menu_index(config))) + config.delivery_fee
+
+
+def calculate_total_batch(carts: List[List[Dict[str, Any]]], config: RestaurantConfig) -> List[float]:
+    # Precifica varios carrinhos com o indice e a taxa de entrega resolvidos uma vez
+    index = _menu_index(config)
+    delivery_fee = config.delivery_fee
+    return [_items_total(_to_soa(cart, index)) + delivery_fee for cart in carts]
+
+
+def _message_fragments(config: RestaurantConfig) -> Tuple[str, str]:
+    # Trechos da mensagem que so dependem da configuracao
+    source = (config.name, config.delivery_fee)
+    cached = config._message_fragments
+    if cached is not None and cached[0] == source:
+        return cached[1]
+    fragments = (
+        f"Pedido - {config.name}",
+        f"Taxa de entrega: R$ {config.delivery_fee:.2f}",
+    )
+    config._message_fragments = (source, fragments)
+    return fragments
 
 
 def build_whatsapp_message(
@@ -118,7 +213,8 @@ def build_whatsapp_message(
     cart: List[Dict[str, Any]],
     customer_info: Dict[str, Any],
 ) -> str:
-    lines: List[str] = [f"Pedido - {config.name}"]
+    header, delivery_fee_line = _message_fragments(config)
+    lines: List[str] = [header]
 
     name = customer_info.get("name")
     if name:
@@ -134,26 +230,19 @@ def build_whatsapp_message(
         lines.append(f"Pagamento: {payment}")
 
     lines.append("Itens:")
-    for entry in cart:
-        item_id = entry.get("id")
-        if not item_id:
-            continue
-        item = find_menu_item(config, item_id)
-        if item is None:
-            continue
-        qty = entry.get("quantity", entry.get("qty", 1))
-        try:
-            quantity = int(qty)
-        except (TypeError, ValueError):
-            quantity = 1
-        quantity = max(quantity, 1)
-        subtotal = item.price * quantity
-        lines.append(
-            f"{quantity}x {item.name} (R$ {item.price:.2f}) = R$ {subtotal:.2f}"
-        )
-
-    lines.append(f"Taxa de entrega: R$ {float(config.delivery_fee):.2f}")
-    total = calculate_total(cart, config)
+    # Referencias locais evitam buscas de atributo a cada item do carrinho
+    fmt = "{:.2f}".format
+    append = lines.append
+    items_total = 0.0
+    view = _to_soa(cart, _menu_index(config))
+    for item, quantity in zip(view.items, view.quantities):
+        price = item.price
+        subtotal = price * quantity
+        items_total += subtotal
+        append(f"{quantity}x {item.name} (R$ {fmt(price)}) = R$ {fmt(subtotal)}")
+
+    lines.append(delivery_fee_line)
+    total = items_total + config.delivery_fee
     lines.append(f"Total: R$ {total:.2f}")
 
     notes = customer_info.get("notes")